@@ -1,7 +1,8 @@
 import os
 
+import orjson
 from celery import Celery
-from flask import Flask
+from flask import Flask, make_response
 from flask_cors import CORS
 from flask_restx import Api
 
@@ -13,6 +14,13 @@ app.secret_key = os.urandom(24)
 # Swagger configuration
 api = Api(app)
 
+
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    # Swagger specs can contain non-string (e.g. status code) keys
+    return make_response(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), code, headers)
+
+
 # Celery configuration
 celery = Celery(app.name, broker_url=f"amqp://{os.environ['RABBITMQ_DEFAULT_USER']}:"
                                      f"{os.environ['RABBITMQ_DEFAULT_PASS']}@"
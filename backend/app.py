@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 
-import json
+import orjson
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from celery import chord, group
 from celery.result import result_from_tuple
-from flask import Response
+from flask import Response, stream_with_context
 from flask import request
 from flask_restx import Resource, fields
 
@@ -14,13 +17,32 @@ from backend import api
 from backend import app
 from backend.discovery.queries import delete_spurious_connections, get_related_between_two_tables
 from backend.utility.celery_tasks import *
-from backend.utility.celery_utils import generate_status_tree
+from backend.utility.celery_utils import fetch_task_metas, generate_status_tree, has_failed_task, result_expires_seconds
 from backend.utility.display import log_format
 from backend.search import redis_tools as db
 
 # Display/logging settings
 logging.basicConfig(format=log_format, level=logging.INFO)
 
+
+def get_reusable_task_id(fingerprint: str) -> Optional[str]:
+    """
+    Gets the id of the task dispatched earlier for the input with the given fingerprint, if it can still be reused.
+
+    Tasks that failed, were revoked or are no longer known are forgotten, so that the input is dispatched again.
+    """
+    task_id = db.get_task_by_fingerprint(fingerprint)
+    if not task_id:
+        return None
+
+    task_tuple = db.get_celery_task(task_id)
+    if not task_tuple or has_failed_task(result_from_tuple(task_tuple)):
+        logging.info(f"Task {task_id} can not be reused, dispatching a new one")
+        db.delete_task_fingerprint(fingerprint)
+        return None
+    return task_id
+
+
 TaskIdModel = api.model('TaskId', {'task_id': fields.String, 'type': fields.String})
 
 
@@ -34,19 +56,27 @@ class IngestData(Resource):
         if len(paths) == 0:
             return Response("No data present on volume", status=204)
 
+        fingerprint = db.task_fingerprint("ingestion", *map(search.io_tools.table_fingerprint, sorted(paths)))
+        task_id = get_reusable_task_id(fingerprint)
+        if task_id:
+            logging.info("Data volume is unchanged since the last ingestion, reusing its task")
+            return Response(orjson.dumps({"task_id": task_id, "type": "Ingestion"}), mimetype='application/json',
+                            status=202)
+
+        existing = db.existing_table_paths(paths)
         header = []
         for table_path in paths:
-            if not db.table_exists(table_path):
+            if table_path not in existing:
                 header.append(add_table.s(table_path))
             else:
                 logging.info(f"Table {table_path} was already processed!")
 
         task_group = group(*header)
         profiling_chord = chord(task_group)(profile_valentine_all.si() | find_inds_all.si())
-        profiling_chord.parent.save()
-        db.save_celery_task(profiling_chord.id, profiling_chord.as_tuple())
+        db.save_celery_task(profiling_chord.id, profiling_chord.as_tuple(), fingerprint=fingerprint,
+                            fingerprint_ttl=result_expires_seconds())
 
-        return Response(json.dumps({"task_id": profiling_chord.id, "type": "Ingestion"}), mimetype='application/json',
+        return Response(orjson.dumps({"task_id": profiling_chord.id, "type": "Ingestion"}), mimetype='application/json',
                         status=202)
 
 
@@ -87,7 +117,7 @@ class TaskStatus(Resource):
         if result is None:
             return Response("Task could not be loaded from backend", status=500)
 
-        return Response(json.dumps(generate_status_tree(result)), mimetype='application/json', status=200)
+        return Response(orjson.dumps(generate_status_tree(result, fetch_task_metas(result))), mimetype='application/json', status=200)
 
 
 @api.route('/purge')
@@ -113,7 +143,7 @@ class FilterConnections(Resource):
         if not deleted_relations:
             logging.info("No relations have been deleted")
 
-        return Response(json.dumps({"deleted_relations": deleted_relations}), mimetype='application/json', status=200)
+        return Response(orjson.dumps({"deleted_relations": deleted_relations}), mimetype='application/json', status=200)
 
 
 @api.route('/profile-valentine')
@@ -140,10 +170,19 @@ class ProfileValentine(Resource):
         if not db.table_exists(table_path):
             return Response("Table in asset has not been ingested yet", status=403)
 
+        other_paths = sorted(table["path"] for table in db.list_tables() if table["path"] != table_path)
+        fingerprint = db.task_fingerprint("valentine", search.io_tools.table_fingerprint(table_path),
+                                          *map(search.io_tools.table_fingerprint, other_paths))
+        task_id = get_reusable_task_id(fingerprint)
+        if task_id:
+            return Response(orjson.dumps({"task_id": task_id, "type": "Valentine Profiling"}),
+                            mimetype='application/json', status=202)
+
         task = profile_valentine_star.delay(table_path)
-        db.save_celery_task(task.id, task.as_tuple())
+        db.save_celery_task(task.id, task.as_tuple(), fingerprint=fingerprint,
+                            fingerprint_ttl=result_expires_seconds())
 
-        return Response(json.dumps({"task_id": task.id, "type": "Valentine Profiling"}), mimetype='application/json',
+        return Response(orjson.dumps({"task_id": task.id, "type": "Valentine Profiling"}), mimetype='application/json',
                         status=202)
 
 
@@ -169,10 +208,17 @@ class AddTable(Resource):
         if db.get_table(table_path):
             return Response("Table in asset was already processed", status=204)
 
+        fingerprint = db.task_fingerprint("add-table", search.io_tools.table_fingerprint(table_path))
+        task_id = get_reusable_task_id(fingerprint)
+        if task_id:
+            return Response(orjson.dumps({"task_id": task_id, "type": "Single Ingestion"}),
+                            mimetype='application/json', status=202)
+
         task = (add_table.si(table_path) | profile_valentine_star.si(table_path)).apply_async()
-        db.save_celery_task(task.id, task.as_tuple())
+        db.save_celery_task(task.id, task.as_tuple(), fingerprint=fingerprint,
+                            fingerprint_ttl=result_expires_seconds())
 
-        return Response(json.dumps({"task_id": task.id, "type": "Single Ingestion"}), mimetype='application/json',
+        return Response(orjson.dumps({"task_id": task.id, "type": "Single Ingestion"}), mimetype='application/json',
                         status=202)
 
 
@@ -183,6 +229,7 @@ class AddTable(Resource):
     'rows': {'description': 'Number of rows to get from the top', 'in': 'query', 'type': 'string', 'required': 'true'}
 })
 class GetTableCSV(Resource):
+    @api.response(200, 'Success')
     @api.response(400, 'Missing asset id or rows query parameters')
     @api.response(404, 'Table in asset does not exist')
     def get(self):
@@ -195,7 +242,8 @@ class GetTableCSV(Resource):
         if not table_path:
             return Response("Table in asset does not exist", status=404)
 
-        return search.io_tools.get_ddf(table_path).head(rows).to_csv()
+        df = search.io_tools.get_ddf(table_path, column_types=db.get_column_types(table_path)).head(rows)
+        return Response(stream_with_context(search.io_tools.iter_csv(df)), mimetype='text/csv', status=200)
 
 
 RelatedTableModel = api.model("RelatedTable", {
@@ -235,21 +283,28 @@ class GetRelatedNodes(Resource):
 
         from_table_path = search.io_tools.get_table_path_from_asset_id(source_asset_id)
         from_table = search.redis_tools.get_table(from_table_path)
-        node = discovery.queries.get_node_by_prop(source_path=from_table_path)
-        if len(node) == 0:
+        # Nodes can exist without table metadata, e.g. while the table is still being ingested
+        if not from_table or not discovery.queries.node_exists(source_path=from_table_path):
             return Response("Table does not exist", status=404)
 
-        related_tables = []
-        for asset_id in target_asset_ids:
+        def get_related(asset_id):
             logging.info(f"Processing {asset_id}")
             to_table_path = search.io_tools.get_table_path_from_asset_id(asset_id)
-            to_table = search.redis_tools.get_table(to_table_path)
-            node = discovery.queries.get_node_by_prop(source_path=to_table_path)
-            if len(node) > 0:
-                related_tables += get_related_between_two_tables(from_table, to_table)
-            else:
+            if not discovery.queries.node_exists(source_path=to_table_path):
                 logging.warning(f"Given asset '{asset_id}' does not exist")
-        return Response(json.dumps({"RelatedTables": related_tables}), mimetype='application/json', status=200)
+                return []
+            to_table = search.redis_tools.get_table(to_table_path)
+            if not to_table:
+                logging.warning(f"Given asset '{asset_id}' has not been fully ingested yet")
+                return []
+            return get_related_between_two_tables(from_table, to_table)
+
+        # Each target costs a few sequential Redis and Neo4j round-trips, so look them up concurrently
+        with ThreadPoolExecutor(max_workers=RELATED_LOOKUP_WORKERS) as executor:
+            results = list(executor.map(get_related, target_asset_ids))
+        related_tables = [related for result in results for related in result]
+
+        return Response(orjson.dumps({"RelatedTables": related_tables}), mimetype='application/json', status=200)
 
 
 # Apparently we need to make models for every nested field...
@@ -282,15 +337,18 @@ class GetJoinable(Resource):
             return Response("Please provide an asset id as query parameter", status=400)
  
         table_path = search.io_tools.get_table_path_from_asset_id(asset_id)
-        node = discovery.queries.get_node_by_prop(source_path=table_path)
-        if len(node) == 0:
+        if not discovery.queries.node_exists(source_path=table_path):
             return Response("Table or asset does not exist", status=404)
 
         table = search.redis_tools.get_table(table_path)
-        return Response(json.dumps({"JoinableTables": discovery.queries.get_joinable(table)}),
+        if not table:
+            return Response("Table or asset does not exist", status=404)
+
+        return Response(orjson.dumps({"JoinableTables": discovery.queries.get_joinable(table)}),
                         mimetype='application/json', status=200)
 
 DEFAULT_PORT = 8080
+RELATED_LOOKUP_WORKERS = 8
 
 if __name__ == "__main__":
     if app.debug:
@@ -1,22 +1,41 @@
 import os
 import logging
 
-from redis import StrictRedis
+from redis import BlockingConnectionPool, StrictRedis
+from redis.commands.json import JSON
 from redis.commands.search.field import TextField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.exceptions import ResponseError
 
 redis_client: StrictRedis = None
+redis_json_client: JSON = None
+
+DEFAULT_MAX_CONNECTIONS = 16
 
 
 def get_client() -> StrictRedis:
     global redis_client
     if redis_client is None:
-        redis_client = StrictRedis(host=os.environ["REDIS_HOST"], port=os.environ["REDIS_PORT"], db=0, password=os.environ["REDIS_PASSWORD"])
+        # Blocking pool, so that concurrent users wait for a free connection instead of opening new ones
+        pool = BlockingConnectionPool(
+            host=os.environ["REDIS_HOST"],
+            port=os.environ["REDIS_PORT"],
+            db=0,
+            password=os.environ["REDIS_PASSWORD"],
+            max_connections=int(os.environ.get("REDIS_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        )
+        redis_client = StrictRedis(connection_pool=pool)
         initialize()
     return redis_client
 
 
+def get_json_client() -> JSON:
+    global redis_json_client
+    if redis_json_client is None:
+        redis_json_client = get_client().json()
+    return redis_json_client
+
+
 def initialize():
     logging.info("Initializing Redis client...")
     table_schema = (
@@ -26,6 +26,12 @@ def get_node(**kwargs):
     return node
 
 
+def node_exists(**kwargs):
+    with neo.get_client().session() as session:
+        exists = session.write_transaction(_node_exists, **kwargs)
+    return exists
+
+
 def get_related_nodes(node_id):
     with neo.get_client().session() as session:
         nodes = session.write_transaction(_get_related_nodes, node_id)
@@ -175,6 +181,15 @@ def _get_node(tx, **kwargs):
     return result
 
 
+def _node_exists(tx, **kwargs):
+    where_query = ' AND '.join('n.{} = ${}'.format(key, key) for key in kwargs.keys())
+
+    tx_result = tx.run("MATCH (n:Node) WHERE {} "
+                       "WITH n LIMIT 1 "
+                       "RETURN count(n) > 0 as exists".format(where_query), **kwargs)
+    return tx_result.single()['exists']
+
+
 def _delete_property(tx, remove_prop, **kwargs):
     where_query = ''
     for i, key in enumerate(kwargs.keys()):
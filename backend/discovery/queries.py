@@ -19,6 +19,10 @@ def get_node_by_prop(**kwargs):
     return node_helper.get_node(**kwargs)
 
 
+def node_exists(**kwargs) -> bool:
+    return node_helper.node_exists(**kwargs)
+
+
 def get_related_nodes(node_id: str):
     node = {'id': node_id}
     nodes = [node]
@@ -48,7 +52,7 @@ def get_related_nodes(node_id: str):
     return related_nodes
 
 
-def get_joinable(table: Dict[str, Any]):
+def get_joinable(table: Dict[str, Any]) -> List[Dict[str, Any]]:
     table_path = table['path']
     table_name = table['name']
     # Get all the nodes belonging to the given table
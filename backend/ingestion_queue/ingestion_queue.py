@@ -9,6 +9,9 @@ logging.basicConfig(format='[%(levelname)s]: %(message)s', level=logging.ERROR)
 
 sys.path.append("..")
 
+# Reuse connections to the API across queue events instead of reconnecting for every request
+session = requests.Session()
+
 
 def callback(ch, method, properties, body):
     # Expects JSON --> convenient if we need to add additional stuff
@@ -17,7 +20,7 @@ def callback(ch, method, properties, body):
 
     try:
         table_name = "/".join(data["Key"].split("/")[1:])
-        requests.get(f"http://localhost:443/addtable/{table_name}")
+        session.get(f"http://localhost:443/addtable/{table_name}")
         logging.info(f"Made GET request to API for table {table_name}")
     except KeyError as e:
         pass
@@ -32,7 +32,8 @@ def find_inclusion_dependencies(table_paths: Set[str]) -> None:
         df = io_tools.get_df(path)
         for c in df:
             ref = Ref(path, frozenset({c}))
-            columns[ref] = df[c].dropna()
+            # Containment only depends on the distinct values, so deduplicate each column once up front
+            columns[ref] = df[c].dropna().drop_duplicates()
 
     # Start selecting suitable candidates for INDs
     cands = {c: set() for c in columns}
@@ -15,26 +15,39 @@ pm.max = lambda series: series.max()
 pm.str_min = lambda series: series.str.len().min()
 pm.str_max = lambda series: series.str.len().max()
 pm.null_values = lambda series: series.isna().sum()
-pm.distinct = lambda series: pm.cardinality(series) == pm.row_count(series)
-pm.uniqueness = lambda series: pm.cardinality(series) / pm.row_count(series)
 pm.data_type = lambda series: str(series.dtype)
 
+dm: SimpleNamespace = SimpleNamespace()
+
+# Derived profiling methods, computed from the results of the profiling methods above instead of the series
+dm.distinct = lambda profile: profile["cardinality"] == profile["row_count"]
+dm.uniqueness = lambda profile: profile["cardinality"] / profile["row_count"]
+
 
 def get_profile_column(series: pd.Series, python_types: bool = True) -> Dict[str, Any]:
     """
-    Gets a profile for the given series, according to the available profiling methods in the "pm" namespace.
+    Gets a profile for the given series, according to the available profiling methods in the "pm" namespace
+    and the methods derived from those in the "dm" namespace.
 
     The python_types flag can be set to make sure that the resulting values in the profile are native python types.
     """
     profile = {}
+    computed = {}
     for name, function in pm.__dict__.items():
         try:
             val = function(series)
-            profile[name] = val
+            profile[name] = computed[name] = val
         except Exception as e:
             logging.warning(f"Failed to apply profiling function `{name}` to column {series.name} because: {e}")
             profile[name] = ''
 
+    for name, function in dm.__dict__.items():
+        try:
+            profile[name] = function(computed)
+        except Exception as e:
+            logging.warning(f"Failed to derive profile `{name}` for column {series.name} because: {e}")
+            profile[name] = ''
+
     if python_types:
         profile = convert_to_python_types(profile)
 
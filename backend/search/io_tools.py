@@ -1,11 +1,43 @@
+import csv
+import logging
+
 import dask.dataframe as dd
 import pandas as pd
+import pyarrow as pa
 import os
 
+from cachetools import TTLCache
+from dask import delayed
+from dask.bytes import read_bytes
+from io import BytesIO
 from pathlib import Path
+from pyarrow import csv as pa_csv
+from threading import Lock
 
 # Typing
-from typing import List
+from typing import Dict, Iterator, List, Optional
+from ..utility.typing import ColumnTypes
+
+
+# Maps asset ids to their table paths, only positive lookups are cached since assets can be added at any time
+_table_path_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_table_path_cache_lock = Lock()
+
+CSV_SAMPLE_BYTES = 256 * 1024
+
+# Arrow types whose default pandas conversion depends on whether the values contain nulls (e.g. ints become floats),
+# mapped to nullable pandas dtypes so that every block of a dask dataframe converts to the same dtype as its meta
+NULLABLE_PANDAS_DTYPES = {
+    pa.bool_(): pd.BooleanDtype(),
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+    pa.uint64(): pd.UInt64Dtype(),
+}
 
 
 def root_path() -> Path:
@@ -20,19 +52,37 @@ def table_exists(table_path: str) -> bool:
     return path.exists()
 
 
-def get_tables() -> List[str]:
+def table_fingerprint(table_path: str) -> str:
     """
-    Gets all tables as a list of paths.
+    Gets a cheap fingerprint of the table at the given path, which changes whenever the file is modified.
+
+    Tables that are no longer on the data volume get a fixed 'missing' fingerprint instead.
+    """
+    try:
+        stat = (root_path() / table_path).stat()
+    except FileNotFoundError:
+        return f"{table_path}:missing"
+    return f"{table_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def iter_tables() -> Iterator[str]:
+    """
+    Lazily yields the paths of all tables, as they are found on the data volume.
     """
     root = root_path()
-    tables = []
     for p in root.iterdir():
-        tables += [str(p.relative_to(root)).strip("/")
-                   for p in (p / "resources").glob("**/*.csv")]
-    return tables
+        for table in (p / "resources").glob("**/*.csv"):
+            yield str(table.relative_to(root)).strip("/")
 
 
-def get_table_path_from_asset_id(asset_id: str) -> str:
+def get_tables() -> List[str]:
+    """
+    Gets all tables as a list of paths.
+    """
+    return list(iter_tables())
+
+
+def _find_table_path(asset_id: str) -> str:
     root = root_path()
     asset_path = root / asset_id
     for p in (asset_path / "resources").glob("**/*.csv"):
@@ -40,6 +90,36 @@ def get_table_path_from_asset_id(asset_id: str) -> str:
     return ""
 
 
+def get_table_path_from_asset_id(asset_id: str) -> str:
+    """
+    Gets the path of the table in the given asset, or an empty string if there is none.
+
+    Found paths are cached for a short while, so repeated requests for the same asset skip the directory scan.
+    """
+    with _table_path_cache_lock:
+        table_path = _table_path_cache.get(asset_id)
+    if table_path is None:
+        table_path = _find_table_path(asset_id)
+        if table_path:
+            with _table_path_cache_lock:
+                _table_path_cache[asset_id] = table_path
+    return table_path
+
+
+def sniff_delimiter(path: Path) -> str:
+    """
+    Sniffs the delimiter of the CSV file at the given path from its header line, defaulting to a comma.
+
+    This mirrors what pandas does for 'sep=None', which is only supported by the (slow) python engine.
+    """
+    with open(path, newline="", encoding="utf8", errors="replace") as f:
+        header = f.readline()
+    try:
+        return csv.Sniffer().sniff(header).delimiter
+    except csv.Error:
+        return ","
+
+
 def get_df(table_path: str, rows=None) -> pd.DataFrame:
     """
     Gets a pandas dataframe from the given table_path.
@@ -51,34 +131,97 @@ def get_df(table_path: str, rows=None) -> pd.DataFrame:
     df = pd.read_csv(
         path,
         header=0,
-        engine="python",
+        engine="c",
         # encoding="utf8",
         quotechar='"',
         escapechar='\\',
         nrows=rows,
-        sep=None,
+        sep=sniff_delimiter(path),
         on_bad_lines='skip',
+        memory_map=True,  # Parse straight from the mapped file instead of buffering it through Python
     )
 
     return df
 
 
-def get_ddf(table_path: str) -> dd.DataFrame:
+def _csv_parse_options() -> pa_csv.ParseOptions:
+    return pa_csv.ParseOptions(delimiter=",", quote_char='"', escape_char='\\')
+
+
+def _infer_schema(path: Path) -> pa.Schema:
+    with open(path, "rb") as f:
+        # Sample the first 256KB worth of rows (completing the last one) to auto-determine dtypes
+        sample = f.read(CSV_SAMPLE_BYTES) + f.readline()
+    schema = pa_csv.read_csv(BytesIO(sample), parse_options=_csv_parse_options()).schema
+    # Columns that are empty within the sample are read as strings, so values further down can still be parsed
+    return pa.schema([(field.name, pa.string() if pa.types.is_null(field.type) else field.type) for field in schema])
+
+
+def get_column_types(table_path: str) -> ColumnTypes:
+    """
+    Gets the column types of the table at the given path as (column, Arrow type name) pairs, in column order.
+
+    The types are inferred from a sample at the start of the file, and can be passed to 'get_ddf' to skip that step
+    for as long as the file is unchanged, which is tracked through its 'table_fingerprint'.
+    """
+    # Fingerprinted before sampling, so that a concurrent modification makes the types outdated rather than unnoticed
+    fingerprint = table_fingerprint(table_path)
+    columns = [(field.name, str(field.type)) for field in _infer_schema(root_path() / table_path)]
+    return {"fingerprint": fingerprint, "columns": columns}
+
+
+def _read_csv_block(block: bytes, header: bytes, column_types: Dict[str, pa.DataType]) -> pd.DataFrame:
+    """
+    Parses a block of CSV lines with Arrow, prepending the header for blocks that do not start with one.
+    """
+    return pa_csv.read_csv(
+        BytesIO(header + block),
+        parse_options=_csv_parse_options(),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+    ).to_pandas(types_mapper=NULLABLE_PANDAS_DTYPES.get)
+
+
+def get_ddf(table_path: str, column_types: Optional[ColumnTypes] = None) -> dd.DataFrame:
     """
     Gets a dask dataframe from the given table_path.
+
+    Each block is parsed by Arrow's CSV reader with the given column types (see 'get_column_types'),
+    which are inferred from a sample at the start of the file when they are not given or the file has changed since.
     """
     path = root_path() / table_path
 
-    ddf = dd.read_csv(
-        path,
-        sample_rows=1000,  # Sample 1000 rows to auto-determine dtypes
-        blocksize=25e6,  # 25MB per block
-        header=0,
-        engine="python",
-        encoding="utf8",
-        quotechar='"',
-        escapechar='\\',
-        # on_bad_lines='warn', # For some reason Dask doesn't like this keyword parameter all of a sudden, even though it is supported!
+    schema = None
+    if column_types and column_types["fingerprint"] != table_fingerprint(table_path):
+        logging.info(f"Stored column types for table at '{table_path}' are outdated, inferring them")
+    elif column_types:
+        try:
+            schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in column_types["columns"]])
+        except ValueError:
+            logging.warning(f"Could not use the stored column types for table at '{table_path}', inferring them")
+    if schema is None:
+        schema = _infer_schema(path)
+
+    with open(path, "rb") as f:
+        header = f.readline()
+    _, blocks = read_bytes(
+        str(path),
+        delimiter=b"\n",
+        blocksize=int(25e6),  # 25MB per block
+        sample=False,
     )
 
+    types = {field.name: field.type for field in schema}
+    parts = [delayed(_read_csv_block)(block, header if i > 0 else b"", types)
+             for i, block in enumerate(blocks[0])]
+    ddf = dd.from_delayed(parts, meta=schema.empty_table().to_pandas(types_mapper=NULLABLE_PANDAS_DTYPES.get))
+
     return ddf
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = 10_000) -> Iterator[str]:
+    """
+    Converts the given dataframe to CSV in chunks of 'chunk_rows' rows, so it can be streamed.
+    """
+    yield df.head(0).to_csv()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(header=False)
@@ -2,70 +2,136 @@ import logging
 import json
 import hashlib
 
-from ast import literal_eval
+from itertools import islice
+
 # Typing
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 # Redis
 from redis.commands.json.path import Path
 from redis.commands.search.query import Query
 
 from ..clients import redis
-from ..utility.typing import Table
+from ..utility.typing import ColumnTypes, Table
+
+TASK_FINGERPRINT_PREFIX = "task_fingerprint:"
+EXISTS_BATCH_SIZE = 500
 
 
 def _deterministic_hash(string: str) -> str:
     return hashlib.sha256(str.encode(string)).hexdigest()
 
 
-def save_celery_task(task_id: str, task_tuple: str) -> None:
+def _task_key(task_id: str) -> str:
+    return f"task:{_deterministic_hash(task_id)}"
+
+
+def _task_fingerprint_key(fingerprint: str) -> str:
+    return f"{TASK_FINGERPRINT_PREFIX}{fingerprint}"
+
+
+def save_celery_task(task_id: str, task_tuple: tuple, fingerprint: Optional[str] = None,
+                     fingerprint_ttl: Optional[int] = None) -> None:
     """
     Saves a Celery task as a tuple tree generated from 'as_tuple' in the database under the given task_id.
+
+    The tree is stored as nested JSON arrays, which 'result_from_tuple' accepts as-is. If the fingerprint of the
+    task's input is given, it is remembered for 'get_task_by_fingerprint' in the same round-trip, for
+    'fingerprint_ttl' seconds (or indefinitely if no TTL is given).
     """
-    task_id_hash = _deterministic_hash(task_id)
-    redis.get_client().json().set(
-        task_id_hash,
+    pipe = redis.get_json_client().pipeline(transaction=False)
+    pipe.set(
+        _task_key(task_id),
         Path.root_path(),
         {
             "task": {
-                "id": task_id_hash,
+                "id": _deterministic_hash(task_id),
                 "name": task_id,
-                "task_tuple": str(task_tuple)
+                "task_tuple": task_tuple
             }
         }
     )
+    if fingerprint and fingerprint_ttl:
+        pipe.setex(_task_fingerprint_key(fingerprint), fingerprint_ttl, task_id)
+    elif fingerprint:
+        # The JSON pipeline's 'set' is JSON.SET, so issue a plain SET explicitly
+        pipe.execute_command("SET", _task_fingerprint_key(fingerprint), task_id)
+    pipe.execute()
 
 
-def get_celery_task(task_id: str) -> Optional[tuple]:
+def get_celery_task(task_id: str) -> Optional[list]:
     """
     Gets a Celery task tuple tree if the task exists, otherwise returns None.
     """
-    query = Query(f"@id:{_deterministic_hash(task_id)}")
-    res = redis.get_client().ft(index_name="task").search(query)
-    first = None
-    if res.docs:
-        first = json.loads(res.docs[0].json)
-    return literal_eval(first["task"]["task_tuple"]) if first else None
+    res = redis.get_json_client().get(_task_key(task_id))
+    return res["task"]["task_tuple"] if res else None
 
 
-def add_table(table_name: str, table_path: str, column_count: int, nodes: Dict[str, str]) -> None:
+def task_fingerprint(*parts: str) -> str:
     """
-    Adds a table with some useful metadata to the database.
+    Combines the given parts (e.g. table fingerprints) into a single fingerprint identifying a task's input.
+    """
+    return _deterministic_hash("|".join(parts))
+
+
+def get_task_by_fingerprint(fingerprint: str) -> Optional[str]:
+    """
+    Gets the id of the task that was dispatched for the input with the given fingerprint, or None if there is none.
+    """
+    task_id = redis.get_client().get(_task_fingerprint_key(fingerprint))
+    return task_id.decode() if task_id else None
+
+
+def delete_task_fingerprint(fingerprint: str) -> None:
+    """
+    Forgets the task that was dispatched for the input with the given fingerprint.
+    """
+    redis.get_client().delete(_task_fingerprint_key(fingerprint))
+
+
+def _table_key(table_path: str) -> str:
+    return f"table:{_deterministic_hash(table_path)}"
+
+
+def _table_document(table_name: str, table_path: str, column_count: int, nodes: Dict[str, str],
+                    column_types: Optional[ColumnTypes]) -> Tuple[str, dict]:
+    """
+    Builds the key and JSON document under which the metadata of a table is stored.
     """
     table_path_hash = _deterministic_hash(table_path)
-    redis.get_client().json().set(
-        f"table:{table_path_hash}",
-        Path.root_path(),
-        {
-            "table": {
-                "id": table_path_hash,
-                "path": table_path,
-                "name": table_name,
-                "column_count": column_count,
-                "nodes": nodes
-            }
+    return _table_key(table_path), {
+        "table": {
+            "id": table_path_hash,
+            "path": table_path,
+            "name": table_name,
+            "column_count": column_count,
+            "nodes": nodes,
+            "column_types": column_types
         }
-    )
+    }
+
+
+def add_table(table_name: str, table_path: str, column_count: int, nodes: Dict[str, str],
+              column_types: Optional[ColumnTypes] = None) -> None:
+    """
+    Adds a table with some useful metadata to the database.
+    """
+    key, document = _table_document(table_name, table_path, column_count, nodes, column_types)
+    redis.get_json_client().set(key, Path.root_path(), document)
+
+
+def add_tables_bulk(tables: List[Table]) -> None:
+    """
+    Adds multiple tables with their metadata to the database in a single round-trip.
+    """
+    if not tables:
+        return
+    pipe = redis.get_json_client().pipeline(transaction=False)
+    for table in tables:
+        key, document = _table_document(table["name"], table["path"], table["column_count"], table["nodes"],
+                                        table.get("column_types"))
+        pipe.set(key, Path.root_path(), document)
+    pipe.execute()
 
 
 def list_tables() -> List[Table]:
@@ -90,6 +156,16 @@ def get_table(table_path: str) -> Optional[Table]:
     return first['table'] if first else None
 
 
+def get_column_types(table_path: str) -> Optional[ColumnTypes]:
+    """
+    Gets the stored column types of the table at the given path (see 'io_tools.get_column_types'), or None if unknown.
+
+    Reads just that field straight from the table's key, instead of searching the index for the whole document.
+    """
+    res = redis.get_json_client().get(_table_key(table_path), "$.table.column_types")
+    return res[0] if res else None
+
+
 def table_exists(table_path: str) -> bool:
     """
     Checks whether there is any table metadata for the given table path.
@@ -97,6 +173,42 @@ def table_exists(table_path: str) -> bool:
     return get_table(table_path) is not None
 
 
+def _existing_table_paths_batch(table_paths: List[str]) -> Set[str]:
+    pipe = redis.get_client().pipeline(transaction=False)
+    for table_path in table_paths:
+        pipe.exists(_table_key(table_path))
+    return {table_path for table_path, exists in zip(table_paths, pipe.execute()) if exists}
+
+
+def _batched(table_paths: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    table_paths = iter(table_paths)
+    batch = list(islice(table_paths, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(table_paths, batch_size))
+
+
+def existing_table_paths(table_paths: Iterable[str], batch_size: int = EXISTS_BATCH_SIZE) -> Set[str]:
+    """
+    Gets the subset of the given table paths that have table metadata, checked in one round-trip per batch.
+    """
+    existing = set()
+    for batch in _batched(table_paths, batch_size):
+        existing |= _existing_table_paths_batch(batch)
+    return existing
+
+
+def iter_new_table_path_batches(table_paths: Iterable[str],
+                                batch_size: int = EXISTS_BATCH_SIZE) -> Iterator[List[str]]:
+    """
+    Lazily goes through the given table paths in batches, yielding for every batch the paths that do not have table
+    metadata yet (possibly none), checked in one round-trip per batch.
+    """
+    for batch in _batched(table_paths, batch_size):
+        existing = _existing_table_paths_batch(batch)
+        yield [table_path for table_path in batch if table_path not in existing]
+
+
 def get_node_ids(table_path: str) -> Dict[str, str]:
     """
     Gets the node ids belonging to the table for the given path.
@@ -113,4 +225,6 @@ def purge() -> None:
     """
     redis.drop_index("table")
     redis.drop_index("task")
+    for key in redis.get_client().scan_iter(match=f"{TASK_FINGERPRINT_PREFIX}*"):
+        redis.get_client().delete(key)
     redis.initialize()
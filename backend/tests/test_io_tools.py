@@ -0,0 +1,47 @@
+import pandas as pd
+
+from backend.search import io_tools
+
+
+def write_table(root, name, content):
+    (root / name).write_text(content)
+    return name
+
+
+def test_get_ddf_keeps_dtypes_of_columns_with_missing_values(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_ROOT_PATH", str(tmp_path))
+    table_path = write_table(tmp_path, "table.csv", "id,flag,count\n1,true,3\n2,,\n3,false,5\n")
+
+    ddf = io_tools.get_ddf(table_path)
+    df = ddf.compute()
+
+    assert df.dtypes.equals(ddf.dtypes)
+    assert df["flag"].dtype == pd.BooleanDtype()
+    assert df["count"].dtype == pd.Int64Dtype()
+    assert df["flag"].isna().tolist() == [False, True, False]
+    assert df["count"].tolist()[::2] == [3, 5]
+
+
+def test_get_ddf_uses_stored_column_types(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_ROOT_PATH", str(tmp_path))
+    table_path = write_table(tmp_path, "table.csv", "id,flag\n1,\n2,\n")
+
+    column_types = {"fingerprint": io_tools.table_fingerprint(table_path),
+                    "columns": [("id", "int64"), ("flag", "bool")]}
+    ddf = io_tools.get_ddf(table_path, column_types=column_types)
+    df = ddf.compute()
+
+    assert df.dtypes.equals(ddf.dtypes)
+    assert df["flag"].dtype == pd.BooleanDtype()
+    assert df["flag"].isna().all()
+
+
+def test_get_ddf_infers_column_types_of_changed_table(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_ROOT_PATH", str(tmp_path))
+    table_path = write_table(tmp_path, "table.csv", "id,value\n1,2\n")
+    column_types = io_tools.get_column_types(table_path)
+    write_table(tmp_path, "table.csv", "id,value\n1,a\n2,b\n")
+
+    df = io_tools.get_ddf(table_path, column_types=column_types).compute()
+
+    assert df["value"].tolist() == ["a", "b"]
@@ -2,7 +2,9 @@ import itertools
 import logging
 import os
 import logging
+from typing import List
 
+import pandas as pd
 from celery.app.task import Task
 from backend import celery
 from .. import search, profiling, discovery
@@ -11,6 +13,7 @@ from ..profiling.ind_finder import find_inclusion_dependencies
 from ..discovery.queries import delete_spurious_connections
 from ..search import io_tools
 from ..search import redis_tools as db
+from ..utility.typing import Table
 
 
 logger = logging.getLogger(__name__)
@@ -29,35 +32,51 @@ class LoggingTask(Task):
 
 @celery.task
 def ingest_all_new_tables():
-    paths = search.io_tools.get_tables()
-    if not paths:
+    found_tables = False
+    ingested = []
+    # Each batch of new tables is ingested as soon as its existence check returns, while the volume is still listed
+    for new_paths in db.iter_new_table_path_batches(search.io_tools.iter_tables()):
+        found_tables = True
+        if new_paths:
+            logging.info(f"Processing {len(new_paths)} new tables")
+            ingested += _ingest_tables(new_paths)
+
+    if not found_tables:
         logging.warning(
             "No tables to process, make sure there is data present on the data volume...")
+    elif ingested:
+        for table in ingested:
+            profile_valentine_star(table["path"])
+            find_inds_star(table["path"])
+
+        logging.info("Cleaning up...")
+        delete_spurious_connections()
     else:
-        to_process = []
-        for table_path in paths:
-            if not db.table_exists(table_path):
-                logging.info(f"Found new table to process: {table_path}")
-                to_process.append(table_path)
-
-        if to_process:
-            logging.info(f"Processing {len(to_process)} new tables")
-            for table_path in to_process:
-                add_table(table_path)
-            for table_path in to_process:
-                profile_valentine_star(table_path)
-                find_inds_star(table_path)
-
-            logging.info("Cleaning up...")
-            delete_spurious_connections()
-        else:
-            logging.info("No new tables to process")
+        logging.info("No new tables to process")
 
 
-@celery.task
-def add_table(table_path: str):
+def _ingest_tables(table_paths: List[str]) -> List[Table]:
     """
-    Adds a table at the given table path to Daisy's databases.
+    Ingests the tables at the given paths, storing the metadata of the ones that succeeded in the db.
+    """
+    tables = []
+    try:
+        for table_path in table_paths:
+            logging.info(f"Found new table to process: {table_path}")
+            try:
+                tables.append(_ingest_table(table_path))
+            except Exception as e:
+                logging.error(f"Failed to ingest table at {table_path} because: {e}")
+    finally:
+        # Nodes of the ingested tables already exist, so their records must be written even if we bail out
+        logging.info(f"- Adding {len(tables)} ingestion records to db")
+        db.add_tables_bulk(tables)
+    return tables
+
+
+def _ingest_table(table_path: str) -> Table:
+    """
+    Creates the nodes for the table at the given table path and returns its metadata, without storing it in the db.
     """
     table_name = table_path.split('/')[-1]
     logging.info(f"- Parsing table at {table_path} into DataFrame")
@@ -75,9 +94,43 @@ def add_table(table_path: str):
 
     discovery.crud.create_subsumption_relation(table_path)
 
+    # Stored so that later reads of the table can skip inferring the column types again
+    column_types = None
+    try:
+        column_types = search.io_tools.get_column_types(table_path)
+    except Exception as e:
+        logging.warning(f"Failed to infer column types of table at {table_path} because: {e}")
+
+    return {"name": table_name, "path": table_path, "column_count": len(df.columns), "nodes": nodes,
+            "column_types": column_types}
+
+
+@celery.task
+def add_table(table_path: str):
+    """
+    Adds a table at the given table path to Daisy's databases.
+    """
+    table = _ingest_table(table_path)
+
     logging.info(f"- Adding ingestion record to db")
 
-    db.add_table(table_name, table_path, len(df.columns), nodes)
+    db.add_table(table["name"], table["path"], table["column_count"], table["nodes"], table["column_types"])
+
+
+def _get_valentine_df(table_path: str) -> pd.DataFrame:
+    """
+    Gets the (row-limited) dataframe of the table at the given path that is used for Valentine profiling.
+    """
+    return search.io_tools.get_df(table_path, rows=int(os.environ['VALENTINE_ROWS_TO_USE']))
+
+
+def _profile_valentine_dfs(table_path_1: str, df1: pd.DataFrame, table_path_2: str, df2: pd.DataFrame):
+    """
+    Profiles the two already loaded tables against each other.
+    """
+    logging.info(f'Valentining files: {table_path_1}, {table_path_2}')
+    matches = match(df1, df2)
+    process_match(table_path_1, table_path_2, matches)
 
 
 @celery.task
@@ -86,8 +139,10 @@ def profile_valentine_all():
     Profiles all tables against each other.
     """
     all_tables = io_tools.get_tables()
+    # Every table takes part in many pairs, so load each one only once
+    dfs = {table_path: _get_valentine_df(table_path) for table_path in all_tables}
     for table_path_1, table_path_2 in itertools.combinations(all_tables, r=2):
-        profile_valentine_pair(table_path_1, table_path_2)
+        _profile_valentine_dfs(table_path_1, dfs[table_path_1], table_path_2, dfs[table_path_2])
 
 
 @celery.task
@@ -96,9 +151,10 @@ def profile_valentine_star(table_path: str):
     Profiles all other tables against the table at the given path.
     """
     all_tables = db.list_tables()
+    df = _get_valentine_df(table_path)
     for other in all_tables:
         if table_path != other["path"]:
-            profile_valentine_pair(table_path, other["path"])
+            _profile_valentine_dfs(table_path, df, other["path"], _get_valentine_df(other["path"]))
 
 
 @celery.task
@@ -106,12 +162,8 @@ def profile_valentine_pair(table_path_1: str, table_path_2: str):
     """
     Profiles the two tables at the given paths against each other.
     """
-    logging.info(f'Valentining files: {table_path_1}, {table_path_2}')
-    rows_to_use = int(os.environ['VALENTINE_ROWS_TO_USE'])
-    df1 = search.io_tools.get_df(table_path_1, rows=rows_to_use)
-    df2 = search.io_tools.get_df(table_path_2, rows=rows_to_use)
-    matches = match(df1, df2)
-    process_match(table_path_1, table_path_2, matches)
+    _profile_valentine_dfs(table_path_1, _get_valentine_df(table_path_1),
+                           table_path_2, _get_valentine_df(table_path_2))
 
 
 @celery.task
@@ -1,24 +1,81 @@
-from typing import Dict, Union, Any
+from datetime import timedelta
+from typing import Dict, List, Optional, Union, Any
 
-from celery.result import AsyncResult, GroupResult
+from celery import states
+from celery.result import AsyncResult, GroupResult, result_from_tuple
 
 from backend import celery as celery_app
 
 
+def _get_children(result: Union[AsyncResult, GroupResult], metas: Dict[str, Dict[str, Any]]) -> List[
+    Union[AsyncResult, GroupResult]]:
+    """
+    Gets the children of the given result, using the prefetched task metadata instead of the backend.
+    """
+    if isinstance(result, GroupResult):
+        return result.results or []
+    children = metas.get(result.id, {}).get("children") or []
+    return [result_from_tuple(child, celery_app) for child in children]
+
+
+def fetch_task_metas(result: Union[AsyncResult, GroupResult]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches the backend metadata of all tasks in the tree of the given result, keyed by task id.
+
+    The tree is walked level by level, fetching the metadata of each level with a single MGET.
+    """
+    backend = celery_app.backend
+    metas = {}
+    seen = set()
+    level = [result]
+    while level:
+        task_ids = list({r.id for r in level if isinstance(r, AsyncResult)} - metas.keys())
+        if task_ids:
+            values = backend.client.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+            for task_id, value in zip(task_ids, values):
+                metas[task_id] = backend.decode_result(value) if value else {}
+
+        seen.update(r.id for r in level)
+        next_level = []
+        for r in level:
+            for related in [r.parent, *_get_children(r, metas)]:
+                if related is not None and related.id not in seen:
+                    next_level.append(related)
+        level = next_level
+    return metas
+
+
+def result_expires_seconds() -> Optional[int]:
+    """
+    Gets the number of seconds after which task results expire in the result backend, or None if they never do.
+    """
+    expires = celery_app.conf.result_expires
+    if isinstance(expires, timedelta):
+        return int(expires.total_seconds())
+    return int(expires) if expires else None
+
+
+def has_failed_task(result: Union[AsyncResult, GroupResult]) -> bool:
+    """
+    Checks whether any task in the tree of the given result failed or was revoked.
+
+    The whole tree is checked, since e.g. a chain whose first task failed leaves its last task pending forever.
+    """
+    metas = fetch_task_metas(result)
+    return any(meta.get("status") in (states.FAILURE, states.REVOKED) for meta in metas.values())
+
+
 # Based on solution(s)/comments/source in: 
 # - https://github.com/celery/celery/issues/4516
 # - https://github.com/celery/celery/blob/v4.2.1/celery/canvas.py#L278
 # - https://github.com/celery/celery/blob/master/celery/result.py#L933
 # TODO: Make this prettier someday (e.g. it sometimes shows duplicate tasks for chains)
-def generate_status_tree(result: Union[AsyncResult, GroupResult]) -> Dict[
+def generate_status_tree(result: Union[AsyncResult, GroupResult], metas: Dict[str, Dict[str, Any]]) -> Dict[
     str, Any]:  # Recursive types unsupported yet in Python 3.7
     """
     Generates a dictionary-based tree with statuses and other metadata of results, 
-    starting from the given celery result.
+    starting from the given celery result and using the task metadata prefetched by 'fetch_task_metas'.
     """
-    if isinstance(result, GroupResult):
-        result = celery_app.GroupResult.restore(result.id)
-
     try:
         result_id = result.id
     except:
@@ -32,12 +89,14 @@ def generate_status_tree(result: Union[AsyncResult, GroupResult]) -> Dict[
         result_dict["status"] = None
 
     elif isinstance(result, AsyncResult):
-        result_dict["name"] = result.name
-        result_dict["args"] = result.args
-        result_dict["status"] = result.status
+        meta = metas.get(result_id, {})
+        result_dict["name"] = meta.get("name")
+        result_dict["args"] = meta.get("args")
+        result_dict["status"] = meta.get("status", states.PENDING)
 
+    children = _get_children(result, metas)
     result_dict["id"] = result_id
-    result_dict["parent"] = generate_status_tree(result.parent) if result.parent else None
-    result_dict["children"] = [generate_status_tree(child) for child in result.children] if result.children else []
+    result_dict["parent"] = generate_status_tree(result.parent, metas) if result.parent else None
+    result_dict["children"] = [generate_status_tree(child, metas) for child in children] if children else []
 
     return result_dict
@@ -1,5 +1,13 @@
 from typing_extensions import TypedDict
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+
+
+class ColumnTypes(TypedDict):
+    """
+    Intended for typing usecases.
+    """
+    fingerprint: str
+    columns: List[Tuple[str, str]]
 
 
 class Table(TypedDict):
@@ -10,3 +18,4 @@ class Table(TypedDict):
     name: str
     column_count: int
     nodes: Dict[str, str]
+    column_types: Optional[ColumnTypes]